@@ -109,7 +109,7 @@ class KPI_Calculator(object):
         tdis_tot = 0
         tdis_dict = OrderedDict()
         for signal in self.case.kpi_json['AirZoneTemperature']:
-            data = np.array(self.case.y_store[signal])
+            data = np.asarray(self.case.y_store[signal])
             dT_lower = LowerSetp - data
             dT_lower[dT_lower<0]=0
             dT_upper = data - UpperSetp
@@ -158,7 +158,7 @@ class KPI_Calculator(object):
         idis_tot = 0
         idis_dict = OrderedDict()
         for signal in self.case.kpi_json['CO2Concentration']:
-            data = np.array(self.case.y_store[signal])
+            data = np.asarray(self.case.y_store[signal])
             dI_upper = data - UpperSetp
             dI_upper[dI_upper<0]=0
             idis_dict[signal[:-1]+'dIupper_y'] = \
@@ -211,7 +211,7 @@ class KPI_Calculator(object):
             if 'Power' in source  and \
             source in self.case.kpi_json.keys():            
                 for signal in self.case.kpi_json[source]:
-                    pow_data = np.array(self.case.y_store[signal])
+                    pow_data = np.asarray(self.case.y_store[signal])
                     ener_dict[signal] = \
                         trapz(pow_data,
                               self.case.y_store['time'])*2.77778e-7 # Convert to kWh
@@ -283,7 +283,7 @@ class KPI_Calculator(object):
                 np.array(self.case.data_manager.get_data(index=index)\
                          ['Price'+source+scenario])       
                 for signal in self.case.kpi_json[source]:
-                    pow_data = np.array(self.case.y_store[signal])
+                    pow_data = np.asarray(self.case.y_store[signal])
                     cost_dict[signal] = \
                         trapz(np.multiply(electricity_price_data,pow_data),
                               self.case.y_store['time'])*2.77778e-7 # Convert to kWh
@@ -299,7 +299,7 @@ class KPI_Calculator(object):
                 np.array(self.case.data_manager.get_data(index=index)\
                          ['Price'+source])            
                 for signal in self.case.kpi_json[source]:
-                    pow_data = np.array(self.case.y_store[signal])
+                    pow_data = np.asarray(self.case.y_store[signal])
                     cost_dict[signal] = \
                         trapz(np.multiply(source_price_data,pow_data),
                               self.case.y_store['time'])*2.77778e-7 # Convert to kWh
@@ -315,7 +315,7 @@ class KPI_Calculator(object):
                 np.array(self.case.data_manager.get_data(index=index)\
                          ['Price'+source])            
                 for signal in self.case.kpi_json[source]:
-                    pow_data = np.array(self.case.y_store[signal])
+                    pow_data = np.asarray(self.case.y_store[signal])
                     cost_dict[signal] = \
                         trapz(np.multiply(source_price_data,pow_data),
                               self.case.y_store['time'])
@@ -378,7 +378,7 @@ class KPI_Calculator(object):
                 np.array(self.case.data_manager.get_data(index=index)\
                          ['Emissions'+source])            
                 for signal in self.case.kpi_json[source]:
-                    pow_data = np.array(self.case.y_store[signal])
+                    pow_data = np.asarray(self.case.y_store[signal])
                     emis_dict[signal] = \
                         trapz(np.multiply(source_emissions_data,pow_data),
                               self.case.y_store['time'])*2.77778e-7 # Convert to kWh
@@ -452,7 +452,7 @@ class KPI_Calculator(object):
         ldfs = OrderedDict()
         
         for signal in self.case.kpi_json['ElectricPower']:
-            pow_data = np.array(self.case.y_store[signal])
+            pow_data = np.asarray(self.case.y_store[signal])
             avg_pow = pow_data.mean()
             max_pow = pow_data.max()
             try:
@@ -473,7 +473,7 @@ class KPI_Calculator(object):
         ppks = OrderedDict()
         
         for signal in self.case.kpi_json['ElectricPower']:
-            pow_data = np.array(self.case.y_store[signal])
+            pow_data = np.asarray(self.case.y_store[signal])
             max_pow = pow_data.max()
             ppks[signal]=max_pow
         
@@ -102,6 +102,14 @@ class Results(Resource):
         Y = case.get_results()
         return Y
         
+class Clamp_Warnings(Resource):
+    '''Interface to test case input truncation warnings.'''
+    
+    def get(self):
+        '''GET request to receive the inputs truncated to their min or max.'''
+        clamp_warnings = case.get_clamp_warnings()
+        return clamp_warnings
+        
 class KPI(Resource):
     '''Interface to test case KPIs.'''
     
@@ -152,6 +160,7 @@ api.add_resource(Step, '/step')
 api.add_resource(Inputs, '/inputs')
 api.add_resource(Measurements, '/measurements')
 api.add_resource(Results, '/results')
+api.add_resource(Clamp_Warnings, '/clamp_warnings')
 api.add_resource(KPI, '/kpi')
 api.add_resource(Forecast_Parameters, '/forecast_parameters')
 api.add_resource(Forecast, '/forecast')
@@ -8,18 +8,26 @@ information, and calculating and reporting results.
 
 from pyfmi import load_fmu
 import numpy as np
-import copy
 import config
+import os
 import time
+import multiprocessing
+from collections import deque
 from data.data_manager import Data_Manager
 from forecast.forecaster import Forecaster
 from kpis.kpi_calculator import KPI_Calculator
 
+# Monotonic high-resolution timer, falling back to the wall clock on Python 2
+timer = getattr(time, 'perf_counter', time.time)
+
 class TestCase(object):
     '''Class that implements the test case.
     
     '''
     
+    # Maximum number of input truncation warnings kept
+    max_clamp_warnings = 1000
+    
     def __init__(self):
         '''Constructor.
         
@@ -29,6 +37,7 @@ class TestCase(object):
         con = config.get_config()
         # Define simulation model
         self.fmupath = con['fmupath']
+        self._name = os.path.splitext(os.path.basename(self.fmupath))[0]
         # Load fmu
         self.fmu = load_fmu(self.fmupath, enable_logging=True)
         # Get version and check is 2.0
@@ -44,33 +53,44 @@ class TestCase(object):
         # Instantiate a KPI calculator for the test case
         self.cal = KPI_Calculator(testcase=self)
         # Get available control inputs and outputs
-        input_names = self.fmu.get_model_variables(causality = 2).keys()
-        output_names = self.fmu.get_model_variables(causality = 3).keys()
+        input_vars = self.fmu.get_model_variables(causality = 2)
+        output_vars = self.fmu.get_model_variables(causality = 3)
+        input_names = tuple(input_vars.keys())
+        output_names = tuple(output_vars.keys())
         # Get input and output meta-data
-        self.inputs_metadata = self._get_var_metadata(self.fmu, input_names, inputs=True)
-        self.outputs_metadata = self._get_var_metadata(self.fmu, output_names)
+        self.inputs_metadata, self.outputs_metadata = \
+            self._get_var_metadata(self.fmu, input_vars, output_vars)
         # Define outputs data
         self.y = {'time':[]}
         for key in output_names:
             self.y[key] = []
-        self.y_store = copy.deepcopy(self.y)
         # Define inputs data
         self.u = {'time':[]}
         for key in input_names:
             self.u[key] = []
-        self.u_store = copy.deepcopy(self.u)
+        self._y_keys = tuple(self.y.keys())
+        self._u_keys = tuple(self.u.keys())
+        # Get activation flag, minimum and maximum of each input
+        self._input_info = [(key, 
+                             '_activate' in key, 
+                             self.inputs_metadata[key]['Minimum'],
+                             self.inputs_metadata[key]['Maximum'])
+                            for key in self._u_keys if key != 'time']
+        # Define storage of measurement and input trajectories, with one 
+        # contiguous buffer per signal grown geometrically as needed
+        self._store_cap = 1024
+        self._store = {key:np.empty(self._store_cap, dtype=np.float64)
+                       for key in set(self.y) | set(self.u)}
+        self.y_store = dict()
+        self.u_store = dict()
         # Set default options
         self.options = self.fmu.simulate_options()
         self.options['CVode_options']['rtol'] = 1e-6 
-        # Set default communication step
-        self.set_step(con['step'])
-        # Set default forecast parameters
-        self.set_forecast_parameters(con['horizon'], con['interval'])
-        # Set initial simulation start
-        self.start_time = 0
-        self.initialize = True
-        self.options['initialize'] = self.initialize
-        self.elapsed_control_time = []
+        # Keep simulation results in memory instead of writing a result 
+        # file at each step
+        self.options['result_handling'] = 'memory'
+        # Set initial state of the test
+        self._set_initial_state(con)
         
     def advance(self,u):
         '''Advances the test case model simulation forward one step.
@@ -80,6 +100,7 @@ class TestCase(object):
         u : dict
             Defines the control input data to be used for the step.
             {<input_name> : <input_value>}
+            Inputs with a value of None are not overwritten.
             
         Returns
         -------
@@ -91,70 +112,129 @@ class TestCase(object):
         
         # Calculate and store the elapsed time 
         if hasattr(self, 'tic_time'):
-            self.tac_time = time.time()
-            self.elapsed_control_time.append(self.tac_time-self.tic_time)
+            self.tac_time = timer()
+            self._store_elapsed_control_time(self.tac_time-self.tic_time)
             
         # Set final time
         self.final_time = self.start_time + self.step
-        # Set control inputs if they exist and are written
-        # Check if possible to overwrite
-        if u.keys():
-            # If there are overwriting keys available
-            # Check that any are overwritten
-            written = False
-            for key in u.keys():
-                if u[key]:
-                    written = True
-                    break
-            # If there are, create input object
-            if written:
-                u_list = []
-                u_trajectory = self.start_time
-                for key in u.keys():
-                    if key != 'time' and u[key]:
-                        value = float(u[key])
-                        # Check min/max if not activation input
-                        if '_activate' not in key:
-                            checked_value = self._check_value_min_max(key, value)
-                        else:
-                            checked_value = value
-                        u_list.append(key)
-                        u_trajectory = np.vstack((u_trajectory, checked_value))
-                input_object = (u_list, np.transpose(u_trajectory))
-            # Otherwise, input object is None
+        # Collect the overwritten inputs and their checked values
+        u_list, u_values = self._collect_inputs(u, 1)
+        # If there are, create input object
+        if u_list:
+            u_values = [values[0] for values in u_values]
+            last_u = (u_list, u_values)
+            # Reuse the last input object if the inputs did not change, 
+            # only updating the time of the step
+            if last_u == self._last_u:
+                input_object = self._last_input_object
+                input_object[1][0,0] = self.start_time
+                input_object[1][1,0] = self.final_time
             else:
-                input_object = None    
+                # Build trajectory with time in the first column and one 
+                # column per written input, held over the start and final time
+                u_trajectory = np.asarray([[self.start_time] + u_values,
+                                           [self.final_time] + u_values],
+                                          dtype=np.float64)
+                input_object = (u_list, u_trajectory)
+                self._last_u = last_u
+                self._last_input_object = input_object
         # Otherwise, input object is None
         else:
             input_object = None
-        # Simulate
-        self.options['initialize'] = self.initialize
-        res = self.fmu.simulate(start_time=self.start_time, 
-                                final_time=self.final_time, 
-                                options=self.options, 
-                                input=input_object)
-        # Get result and store measurement
-        for key in self.y.keys():
-            self.y[key] = res[key][-1]
-            self.y_store[key] = self.y_store[key] + res[key].tolist()[1:]
-        # Store control inputs
-        for key in self.u.keys():
-            self.u_store[key] = self.u_store[key] + res[key].tolist()[1:] 
-        # Advance start time
-        self.start_time = self.final_time
-        # Prevent inialize
-        self.initialize = False
+        # Simulate and store results
+        self._simulate(input_object)
         # Raise the flag to compute time lapse
-        self.tic_time = time.time()
+        self.tic_time = timer()
+        
+        return self.y
+
+    def advance_n(self, U, n_steps):
+        '''Advances the test case model simulation forward several steps.
+        
+        All steps are simulated with a single call to the fmu, which avoids
+        setting up a new simulation at each step when the control inputs 
+        are known in advance, for instance for offline runs.
+        
+        Parameters
+        ----------
+        U : dict
+            Defines the control input data to be used for the steps.
+            {<input_name> : <input_values>}
+            where <input_values> is a sequence with one value per step,
+            which is held constant during the step.  Inputs with a value 
+            of None are not overwritten over all steps.  An input cannot be
+            left unwritten for only some of the steps, so a None, nan or 
+            infinite value within a sequence raises a ValueError.
+        n_steps : int
+            Number of steps to advance, at least 1.
+            
+        Returns
+        -------
+        y : dict
+            Contains the measurement data at the end of the last step.
+            {<measurement_name> : <measurement_value>}
+            
+        '''
+        
+        # Check the number of steps
+        n_steps = int(n_steps)
+        if n_steps < 1:
+            raise ValueError('Number of steps must be at least 1, got {0}.'.format(n_steps))
+        # Calculate and store the elapsed time, split evenly over the steps
+        # such that the computational time ratio is comparable to advance
+        if hasattr(self, 'tic_time'):
+            self.tac_time = timer()
+            for _ in range(n_steps):
+                self._store_elapsed_control_time(
+                    (self.tac_time-self.tic_time)/n_steps)
+            
+        # Set final time
+        self.final_time = self.start_time + n_steps*self.step
+        # Collect the overwritten inputs and their checked values
+        u_list, u_values = self._collect_inputs(U, n_steps)
+        # If there are, create input object
+        if u_list:
+            # Allocate trajectory with time in the first column and one 
+            # column per written input, with two points per step to hold 
+            # each value from the start to the end of its step
+            u_trajectory = np.empty((2*n_steps, len(u_list)+1), dtype=np.float64)
+            step_times = self.start_time + self.step*np.arange(n_steps+1)
+            u_trajectory[:,0] = np.repeat(step_times, 2)[1:-1]
+            for i, values in enumerate(u_values):
+                u_trajectory[:,i+1] = np.repeat(values, 2)
+            input_object = (u_list, u_trajectory)
+        # Otherwise, input object is None
+        else:
+            input_object = None
+        # Keep the number of communication points per step
+        ncp = self.options['ncp']
+        self.options['ncp'] = n_steps*ncp
+        try:
+            # Simulate and store results
+            self._simulate(input_object)
+        finally:
+            self.options['ncp'] = ncp
+        # Raise the flag to compute time lapse
+        self.tic_time = timer()
         
         return self.y
 
     def reset(self):
         '''Reset the test.
         
+        The fmu already loaded is reset, such that the metadata and the 
+        test case data are kept.  If the fmu cannot be reset, the test 
+        case is fully reinstantiated.
+        
         '''
         
-        self.__init__()
+        try:
+            self.fmu.reset()
+        except Exception as err:
+            print('WARNING: Reset of the fmu failed with "{0}".  Reinstantiating the test case.'.format(err))
+            self.__init__()
+        else:
+            self._set_initial_state(config.get_config())
 
     def get_step(self):
         '''Returns the current simulation step in seconds.'''
@@ -233,7 +313,40 @@ class TestCase(object):
         
         '''
         
-        Y = {'y':self.y_store, 'u':self.u_store}
+        Y = {'y':{key:self.y_store[key].tolist() for key in self.y_store},
+             'u':{key:self.u_store[key].tolist() for key in self.u_store}}
+        
+        return Y
+        
+    def get_results_numpy(self):
+        '''Returns measurement and control input trajectories as numpy arrays.
+        
+        The arrays are read-only views of the result storage of the test 
+        case and are not copied.  They hold the trajectories up to the time 
+        of the call and are not extended by later steps.  Their contents 
+        are overwritten by the steps following a call to reset.
+        
+        Parameters
+        ----------
+        None
+        
+        Returns
+        -------
+        Y : dict
+            Dictionary of measurement and control input names and their 
+            trajectories as numpy arrays.
+            {'y':{<measurement_name>:<measurement_trajectory>},
+             'u':{<input_name>:<input_trajectory>}
+            }
+        
+        '''
+        
+        Y = {'y':dict(), 'u':dict()}
+        for s, store in [('y', self.y_store), ('u', self.u_store)]:
+            for key in store:
+                view = np.asarray(store[key]).view()
+                view.flags.writeable = False
+                Y[s][key] = view
         
         return Y
         
@@ -328,7 +441,7 @@ class TestCase(object):
             
         '''
         
-        name = self.fmupath[7:-4]
+        name = self._name
         
         return name
         
@@ -346,95 +459,468 @@ class TestCase(object):
             
         '''
         
-        elapsed_control_time = self.elapsed_control_time
+        elapsed_control_time = \
+            self.elapsed_control_time[:self._ect_len].tolist()
         
         return elapsed_control_time
         
-    def _get_var_metadata(self, fmu, var_list, inputs=False):
-        '''Build a dictionary of variables and their metadata.
+    def get_clamp_warnings(self):
+        '''Returns the warnings of inputs truncated to their min or max.
+        
+        Only the most recent warnings are kept, up to the number given by 
+        max_clamp_warnings.
+        
+        Parameters
+        ----------
+        None
+        
+        Returns
+        -------
+        clamp_warnings : list of dict
+            Warning for each input value that was truncated, in the order 
+            they occurred.
+            [{'time':<step_start_time>,
+              'input':<input_name>,
+              'value':<specified_value>,
+              'used':<truncated_value>}]
+            
+        '''
+        
+        clamp_warnings = [{'time':float(t), 
+                           'input':var, 
+                           'value':float(value), 
+                           'used':float(checked_value)}
+                          for t, var, value, checked_value 
+                          in self._clamp_warnings]
+        
+        return clamp_warnings
+        
+    def _get_var_metadata(self, fmu, input_vars, output_vars):
+        '''Build dictionaries of input and output variables and their metadata.
+        
+        The description is read from the scalar variable objects already 
+        retrieved from the fmu, such that only the unit, minimum and maximum
+        require additional calls to the fmu.
         
         Parameters
         ----------
         fmu : pyfmi fmu object
             FMU from which to get variable metadata
-        var_list : list of str
-            List of variable names
+        input_vars : dict
+            Dictionary of input variable names as keys and pyfmi scalar 
+            variable objects as values.
+        output_vars : dict
+            Dictionary of output variable names as keys and pyfmi scalar 
+            variable objects as values.
             
         Returns
         -------
-        var_metadata : dict
-            Dictionary of variable names as keys and metadata as fields.
+        inputs_metadata : dict
+            Dictionary of input variable names as keys and metadata as fields.
             {<var_name_str> :
                 "Unit" : str,
                 "Description" : str,
                 "Minimum" : float,
                 "Maximum" : float
             }
+        outputs_metadata : dict
+            Dictionary of output variable names as keys and metadata as 
+            fields, with the same structure as inputs_metadata.  The minimum
+            and maximum of outputs are None.
             
         '''
         
         # Inititalize
-        var_metadata = dict()
+        inputs_metadata = dict()
+        outputs_metadata = dict()
         # Get metadata        
-        for var in var_list:
-            # Units
-            if var == 'time':
-                unit = 's'
-                description = 'Time of simulation'
-                mini = None
-                maxi = None
-            elif '_activate' in var:
-                unit = None
-                description = fmu.get_variable_description(var)
-                mini = None
-                maxi = None
-            else:
-                unit = fmu.get_variable_unit(var)
-                description = fmu.get_variable_description(var)
-                if inputs:
-                    mini = fmu.get_variable_min(var)
-                    maxi = fmu.get_variable_max(var)
-                else:
+        for inputs, model_vars, var_metadata in \
+                [(True, input_vars, inputs_metadata), 
+                 (False, output_vars, outputs_metadata)]:
+            for var, scalar_var in model_vars.items():
+                # Units
+                if var == 'time':
+                    unit = 's'
+                    description = 'Time of simulation'
                     mini = None
                     maxi = None
-            var_metadata[var] = {'Unit':unit,
-                                 'Description':description,
-                                 'Minimum':mini,
-                                 'Maximum':maxi}
+                elif '_activate' in var:
+                    unit = None
+                    description = scalar_var.description
+                    mini = None
+                    maxi = None
+                else:
+                    unit = fmu.get_variable_unit(var)
+                    description = scalar_var.description
+                    if inputs:
+                        mini = fmu.get_variable_min(var)
+                        maxi = fmu.get_variable_max(var)
+                    else:
+                        mini = None
+                        maxi = None
+                var_metadata[var] = {'Unit':unit,
+                                     'Description':description,
+                                     'Minimum':mini,
+                                     'Maximum':maxi}
 
-        return var_metadata
+        return inputs_metadata, outputs_metadata
+        
+    def _set_initial_state(self, con):
+        '''Set the simulation state and storage to the start of the test.
+        
+        Parameters
+        ----------
+        con : dict
+            Configuration information of the test case.
+            
+        Returns
+        -------
+        None
+        
+        '''
+        
+        # Empty measurement and control input data
+        for key in self._y_keys:
+            self.y[key] = []
+        self._store_len = 0
+        for key in self._y_keys:
+            self.y_store[key] = self._store[key][:0]
+        for key in self._u_keys:
+            self.u_store[key] = self._store[key][:0]
+        # Set default communication step
+        self.set_step(con['step'])
+        # Set default forecast parameters
+        self.set_forecast_parameters(con['horizon'], con['interval'])
+        # Set initial simulation start
+        self.start_time = 0
+        self.initialize = True
+        self.options['initialize'] = self.initialize
+        self.elapsed_control_time = np.empty(1024, dtype=np.float64)
+        self._ect_len = 0
+        self._clamp_warnings = deque(maxlen=self.max_clamp_warnings)
+        self._last_u = None
+        self._last_input_object = None
+        
+        return None
         
-    def _check_value_min_max(self, var, value):
-        '''Check that the input value does not violate the min or max.
+    def _collect_inputs(self, u, n_steps):
+        '''Collect the overwritten control inputs and their checked values.
         
-        Note that if it does, the value is truncated to the minimum or maximum.
+        An input is overwritten if its value is not None, in which case all 
+        of its values must be finite numbers.  Values of inputs that are 
+        not activations are truncated to the minimum and maximum 
+        of the input, and a warning is recorded for each truncated value.
         
         Parameters
         ----------
-        var : str
-            Name of variable
-        value : numeric
-            Specified value of variable
+        u : dict
+            Control input data.
+            {<input_name> : <input_values>}
+            where <input_values> is a value or a sequence of values, one 
+            per step.
+        n_steps : int
+            Number of steps of the control input data.
             
-        Return
+        Returns
+        -------
+        u_list : list of str
+            Names of the overwritten inputs.
+        u_values : list of numpy arrays
+            Checked values of the overwritten inputs, one per step.
+            
+        Raises
         ------
+        KeyError
+            If a key of u is neither 'time' nor a control input.
+        ValueError
+            If an overwritten input does not have one value per step or has 
+            a value that is not a finite number.
+            
+        '''
+        
+        # Check that all keys are time or control inputs
+        for key in u:
+            if key != 'time' and key not in self.inputs_metadata:
+                raise KeyError('{0} is not a control input of the test case.'.format(key))
+        # Collect and check the overwritten inputs
+        written = []
+        for key, activate, mini, maxi in self._input_info:
+            values = u.get(key)
+            if values is None:
+                continue
+            values = np.asarray(values, dtype=np.float64).reshape(-1)
+            if values.size != n_steps:
+                raise ValueError('Input {0} must have {1} values, one per step.'.format(key, n_steps))
+            if not np.all(np.isfinite(values)):
+                raise ValueError('Input {0} must have finite values, got {1}.'.format(key, values.tolist()))
+            written.append((key, activate, mini, maxi, values))
+        # Truncate values to min/max if not activation input
+        u_list = []
+        u_values = []
+        for key, activate, mini, maxi, values in written:
+            if not activate:
+                checked_values = np.clip(values, mini, maxi)
+                for i in np.flatnonzero(checked_values != values):
+                    self._record_clamp_warning(self.start_time + i*self.step,
+                                               key, values[i], 
+                                               checked_values[i])
+                values = checked_values
+            u_list.append(key)
+            u_values.append(values)
+            
+        return u_list, u_values
+        
+    def _record_clamp_warning(self, time, var, value, checked_value):
+        '''Record a warning for an input value truncated to its min or max.
+        
+        Parameters
+        ----------
+        time : float
+            Start time of the step in seconds.
+        var : str
+            Name of the input.
+        value : float
+            Specified value of the input.
         checked_value : float
-            Value of variable truncated by min and max.
+            Truncated value of the input.
             
+        Returns
+        -------
+        None
+        
         '''
         
-        # Get minimum and maximum for variable
-        mini = self.inputs_metadata[var]['Minimum']
-        maxi = self.inputs_metadata[var]['Maximum']
-        # Check the value and truncate if necessary
-        if value > maxi:
-            checked_value = maxi
-            print('WARNING: Value of {0} for {1} is above maximum of {2}.  Using {2}.'.format(value, var, maxi))
-        elif value < mini:
-            checked_value = mini
-            print('WARNING: Value of {0} for {1} is below minimum of {2}.  Using {2}.'.format(value, var, mini))
+        self._clamp_warnings.append((time, var, value, checked_value))
+        
+        return None
+        
+    def _simulate(self, input_object):
+        '''Simulate the fmu from the start time to the final time.
+        
+        The measurements at the final time and the measurement and control 
+        input trajectories are stored, and the start time is advanced to 
+        the final time.
+        
+        Parameters
+        ----------
+        input_object : tuple or None
+            Input object passed to the pyfmi simulate function, or None if
+            no input is overwritten.
+            
+        Returns
+        -------
+        None
+        
+        '''
+        
+        # Simulate
+        res = self.fmu.simulate(start_time=self.start_time, 
+                                final_time=self.final_time, 
+                                options=self.options, 
+                                input=input_object)
+        # Get result and store measurement as plain floats
+        for key in self._y_keys:
+            self.y[key] = float(res[key][-1])
+        # Store measurement and control input trajectories
+        self._store_results(res)
+        # Advance start time
+        self.start_time = self.final_time
+        # Prevent inialize, only setting the option at the first step
+        if self.initialize:
+            self.initialize = False
+            self.options['initialize'] = self.initialize
+        
+        return None
+        
+    def _store_results(self, res):
+        '''Append the trajectories of a simulation to the result storage.
+        
+        The first point of the simulation result is skipped since it 
+        coincides with the last point stored from the previous step.
+        
+        Parameters
+        ----------
+        res : pyfmi result object
+            Result of the simulation of the last step.
+            
+        Returns
+        -------
+        None
+        
+        '''
+        
+        # Grow the storage if the new points do not fit
+        length = self._store_len + len(res['time']) - 1
+        if length > self._store_cap:
+            self._store_cap = max(2*self._store_cap, length)
+            for key in self._store:
+                self._store[key] = self._grow_buffer(self._store[key], 
+                                                     self._store_len,
+                                                     self._store_cap)
+        # Copy the new points
+        for key in self._store:
+            self._store[key][self._store_len:length] = res[key][1:]
+        self._store_len = length
+        # Update the measurement and control input trajectories
+        for key in self._y_keys:
+            self.y_store[key] = self._store[key][:length]
+        for key in self._u_keys:
+            self.u_store[key] = self._store[key][:length]
+        
+        return None
+    
+    def _store_elapsed_control_time(self, elapsed):
+        '''Append the elapsed control time of a step to its storage.
+        
+        Parameters
+        ----------
+        elapsed : float
+            Elapsed control time in seconds.
+            
+        Returns
+        -------
+        None
+        
+        '''
+        
+        # Grow the storage if full
+        if self._ect_len == len(self.elapsed_control_time):
+            self.elapsed_control_time = self._grow_buffer(
+                self.elapsed_control_time, self._ect_len, 2*self._ect_len)
+        self.elapsed_control_time[self._ect_len] = elapsed
+        self._ect_len += 1
+        
+        return None
+    
+    def _grow_buffer(self, buf, length, capacity):
+        '''Copy the filled part of a buffer into a larger buffer.
+        
+        Parameters
+        ----------
+        buf : numpy array
+            Buffer to grow.
+        length : int
+            Number of filled elements of the buffer.
+        capacity : int
+            Size of the new buffer.
+            
+        Returns
+        -------
+        new_buf : numpy array
+            New buffer with the first length elements copied from buf.
+            
+        '''
+        
+        new_buf = np.empty(capacity, dtype=np.float64)
+        new_buf[:length] = buf[:length]
+        
+        return new_buf
+
+
+# Test case of the worker processes of run_many
+_worker_case = None
+
+def run_many(scenarios, n_workers=None, share_fmu=False):
+    '''Runs independent scenarios of the test case in parallel processes.
+    
+    Each worker process runs its scenarios with its own test case, which 
+    is reset before each scenario, since fmus cannot be shared between 
+    simultaneous simulations.
+    
+    Parameters
+    ----------
+    scenarios : list of dict
+        Scenarios to run, each defined by a dictionary with fields
+        'step' : float, optional
+            Simulation step in seconds.  Default is the test case step.
+        'u' : list of dict
+            Control input data for each step, as used by advance.
+    n_workers : int, optional
+        Number of worker processes.  Default is the number of cpus.
+    share_fmu : bool, optional
+        True to instantiate the test case once in this process and let the 
+        workers inherit it when forked, such that the fmu is loaded only 
+        once.  Requires the fork start method, available on POSIX systems.
+        The fmu is loaded with logging enabled, so all workers then write
+        to the log of the parent fmu and their log output is interleaved.
+        Default is False, in which case each worker instantiates its own 
+        test case and fmu log.
+        
+    Returns
+    -------
+    results : list of dict
+        Results of each scenario, in the same order as scenarios.
+        {'results':<trajectories from get_results>,
+         'kpis':<kpis from get_kpis>
+        }
+        
+    '''
+    
+    # Instantiate the shared test case if requested
+    if share_fmu:
+        case = TestCase()
+        if hasattr(multiprocessing, 'get_context'):
+            context = multiprocessing.get_context('fork')
         else:
-            checked_value = value
+            context = multiprocessing
+    else:
+        case = None
+        context = multiprocessing
+    # Run the scenarios
+    pool = context.Pool(processes=n_workers, 
+                        initializer=_init_worker, 
+                        initargs=(case,))
+    try:
+        results = pool.map(_run_scenario, scenarios, chunksize=1)
+    finally:
+        pool.terminate()
+        pool.join()
+    
+    return results
 
-        return checked_value
-            
+def _init_worker(case):
+    '''Sets the test case of a worker process of run_many.
+    
+    Parameters
+    ----------
+    case : TestCase or None
+        Test case inherited from the parent process, or None to 
+        instantiate a new test case.
+        
+    Returns
+    -------
+    None
+    
+    '''
+    
+    global _worker_case
+    if case is None:
+        case = TestCase()
+    _worker_case = case
+    
+    return None
+
+def _run_scenario(scenario):
+    '''Runs a scenario of run_many with the test case of the worker process.
+    
+    Parameters
+    ----------
+    scenario : dict
+        Scenario definition as described in run_many.
+        
+    Returns
+    -------
+    result : dict
+        Trajectories and kpis of the scenario.
+        
+    '''
+    
+    case = _worker_case
+    case.reset()
+    if 'step' in scenario:
+        case.set_step(scenario['step'])
+    for u in scenario['u']:
+        case.advance(u)
+    result = {'results':case.get_results(), 'kpis':case.get_kpis()}
+    
+    return result
@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+"""
+This module runs tests for the test case object using testcase 2.
+
+"""
+
+import unittest
+import os
+import numpy as np
+import utilities
+from testcase import TestCase, run_many
+
+def get_trajectories(case):
+    '''Returns copies of the measurement and control input trajectories.
+    
+    Parameters
+    ----------
+    case : TestCase
+        Test case from which to get the trajectories.
+        
+    Returns
+    -------
+    y_store : dict
+        Measurement trajectories as numpy arrays.
+    u_store : dict
+        Control input trajectories as numpy arrays.
+        
+    '''
+    
+    y_store = {key:np.array(case.y_store[key]) for key in case.y_store}
+    u_store = {key:np.array(case.u_store[key]) for key in case.u_store}
+    
+    return y_store, u_store
+
+class Advance(unittest.TestCase):
+    '''Tests advancing one step.
+    
+    '''
+    
+    def setUp(self):
+        '''Setup for each test.
+        
+        '''
+        
+        self.case = TestCase()
+        
+    def test_unknown_input(self):
+        '''Tests that inputs that are not in the model are not ignored.
+        
+        '''
+        
+        u = {'oveTSetRooHea_activate':1, 'oveTSetRooHeat_u':273.15+20}
+        self.assertRaises(KeyError, self.case.advance, u)
+        U = {'oveTSetRooHea_activate':[1], 'oveTSetRooHeat_u':[273.15+20]}
+        self.assertRaises(KeyError, self.case.advance_n, U, 1)
+        
+    def test_clamp_warnings(self):
+        '''Tests that truncated inputs are recorded as warnings.
+        
+        '''
+        
+        u = {'oveTSetRooHea_activate':1, 'oveTSetRooHea_u':273.15+40}
+        self.case.advance(u)
+        clamp_warnings = self.case.get_clamp_warnings()
+        self.assertEqual(len(clamp_warnings), 1)
+        self.assertEqual(clamp_warnings[0]['input'], 'oveTSetRooHea_u')
+        self.assertAlmostEqual(clamp_warnings[0]['time'], 0.)
+        self.assertAlmostEqual(clamp_warnings[0]['value'], 273.15+40)
+        self.assertAlmostEqual(clamp_warnings[0]['used'], 273.15+35)
+        
+    def test_get_results_numpy(self):
+        '''Tests that the numpy results match the results and are read-only.
+        
+        '''
+        
+        self.case.advance({})
+        Y = self.case.get_results()
+        Y_numpy = self.case.get_results_numpy()
+        for s in ['y', 'u']:
+            self.assertEqual(set(Y_numpy[s].keys()), set(Y[s].keys()))
+            for key in Y[s]:
+                np.testing.assert_array_equal(Y_numpy[s][key], Y[s][key])
+        with self.assertRaises(ValueError):
+            Y_numpy['y']['time'][0] = 1.
+        
+class Reset(unittest.TestCase):
+    '''Tests resetting the test case.
+    
+    '''
+    
+    def setUp(self):
+        '''Setup for each test.
+        
+        '''
+        
+        self.case = TestCase()
+        self.u = [{'oveTSetRooHea_activate':1, 'oveTSetRooHea_u':273.15+20},
+                  {'oveTSetRooHea_activate':1, 'oveTSetRooHea_u':273.15+22},
+                  {}]
+        
+    def run_steps(self, case):
+        '''Advances the test case with the inputs of the test.
+        
+        Parameters
+        ----------
+        case : TestCase
+            Test case to advance.
+            
+        Returns
+        -------
+        y : dict
+            Measurements at the end of the last step.
+        kpis : dict
+            KPIs at the end of the last step.
+            
+        '''
+        
+        for u in self.u:
+            y = dict(case.advance(u))
+        kpis = case.get_kpis()
+        
+        return y, kpis
+        
+    def test_reset(self):
+        '''Compares advancing after a reset with a new test case.
+        
+        '''
+        
+        # Advance a new test case
+        y_ref, kpis_ref = self.run_steps(TestCase())
+        # Advance, reset and advance again
+        self.case.set_step(7200)
+        self.run_steps(self.case)
+        self.case.reset()
+        self.assertEqual(self.case.start_time, 0)
+        self.assertEqual(len(self.case.y_store['time']), 0)
+        self.assertEqual(len(self.case.get_elapsed_control_time()), 0)
+        y, kpis = self.run_steps(self.case)
+        # Compare measurements and kpis, except the computational time ratio
+        for key in y_ref:
+            self.assertAlmostEqual(y[key], y_ref[key], places=3)
+        for key in ['tdis_tot', 'idis_tot', 'ener_tot', 'cost_tot', 'emis_tot']:
+            self.assertAlmostEqual(kpis[key], kpis_ref[key], places=3)
+        
+class AdvanceN(unittest.TestCase):
+    '''Tests advancing several steps with a single simulation.
+    
+    '''
+    
+    def setUp(self):
+        '''Setup for each test.
+        
+        '''
+        
+        self.case = TestCase()
+        self.n_steps = 3
+        self.U = {'oveTSetRooHea_activate':[1, 1, 1],
+                  'oveTSetRooHea_u':[273.15+20, 273.15+22, 273.15+21]}
+        
+    def test_advance_n(self):
+        '''Compares advance_n with advancing the same inputs step by step.
+        
+        '''
+        
+        # Advance step by step with a reference test case
+        case_ref = TestCase()
+        for i in range(self.n_steps):
+            y_ref = dict(case_ref.advance({key:self.U[key][i] for key in self.U}))
+        y_store_ref, u_store_ref = get_trajectories(case_ref)
+        # Advance all steps at once
+        y = dict(self.case.advance_n(self.U, self.n_steps))
+        y_store, u_store = get_trajectories(self.case)
+        # Compare measurements and trajectories
+        self.assertEqual(set(y.keys()), set(y_ref.keys()))
+        for key in y_ref:
+            self.assertAlmostEqual(y[key], y_ref[key], places=3)
+        for store, store_ref in [(y_store, y_store_ref), (u_store, u_store_ref)]:
+            self.assertEqual(set(store.keys()), set(store_ref.keys()))
+            for key in store_ref:
+                np.testing.assert_allclose(store[key], store_ref[key], 
+                                           rtol=1e-3, atol=1e-3)
+                
+    def test_advance_n_not_finite(self):
+        '''Tests that advance_n rejects values that are not finite numbers.
+        
+        '''
+        
+        for value in [None, float('nan'), float('inf')]:
+            for key in ['oveTSetRooHea_u', 'oveTSetRooHea_activate']:
+                U = dict(self.U)
+                U[key] = list(U[key])
+                U[key][1] = value
+                self.assertRaises(ValueError, self.case.advance_n, U, self.n_steps)
+        # No step is simulated and no warning is recorded
+        self.assertEqual(self.case.start_time, 0)
+        self.assertEqual(len(self.case.get_clamp_warnings()), 0)
+        
+    def test_advance_n_steps(self):
+        '''Tests that advance_n requires at least one step.
+        
+        '''
+        
+        for n_steps in [0, -1]:
+            self.assertRaises(ValueError, self.case.advance_n, {}, n_steps)
+        
+class RunMany(unittest.TestCase):
+    '''Tests running scenarios in parallel processes.
+    
+    '''
+    
+    def setUp(self):
+        '''Setup for each test.
+        
+        '''
+        
+        self.scenarios = [{'u':[{'oveTSetRooHea_activate':1, 
+                                 'oveTSetRooHea_u':273.15+T}]*3}
+                          for T in [18, 22]]
+        # Run the scenarios serially
+        case = TestCase()
+        self.results_ref = []
+        for scenario in self.scenarios:
+            case.reset()
+            for u in scenario['u']:
+                case.advance(u)
+            self.results_ref.append({'results':case.get_results(), 
+                                     'kpis':case.get_kpis()})
+            
+    def check_results(self, results):
+        '''Compares results of run_many with the serial results.
+        
+        Parameters
+        ----------
+        results : list of dict
+            Results returned by run_many.
+            
+        '''
+        
+        self.assertEqual(len(results), len(self.results_ref))
+        for result, result_ref in zip(results, self.results_ref):
+            for s in ['y', 'u']:
+                for key in result_ref['results'][s]:
+                    np.testing.assert_allclose(result['results'][s][key], 
+                                               result_ref['results'][s][key],
+                                               rtol=1e-6)
+            for key in ['tdis_tot', 'idis_tot', 'ener_tot', 'cost_tot', 'emis_tot']:
+                self.assertAlmostEqual(result['kpis'][key], 
+                                       result_ref['kpis'][key], places=3)
+        
+    def test_run_many(self):
+        '''Tests scenarios run by workers with their own test case.
+        
+        '''
+        
+        self.check_results(run_many(self.scenarios, n_workers=2))
+        
+    def test_run_many_share_fmu(self):
+        '''Tests scenarios run by workers sharing a forked test case.
+        
+        '''
+        
+        self.check_results(run_many(self.scenarios, n_workers=2, 
+                                    share_fmu=True))
+        
+if __name__ == '__main__':
+    utilities.run_tests(os.path.basename(__file__))